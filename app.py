@@ -6,20 +6,46 @@ Production-ready version with improved error handling and security
 
 from flask import Flask, request, jsonify, Response, stream_with_context, render_template, send_from_directory
 from flask_cors import CORS
+import aiosmtplib
 import json
 import smtplib
 import os
 import re
+import asyncio
+import binascii
+import hashlib
+import queue
+import threading
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email import encoders
+from email.charset import Charset
 from werkzeug.utils import secure_filename
 import time
-from typing import Generator, Dict, Any, List
+from typing import IO, Callable, Generator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+# SIMD base64 codec for attachments; fall back to the stdlib scalar encoder
+try:
+    import pybase64
+
+    def b64encode(data) -> bytes:
+        return pybase64.b64encode(data)
+except ImportError:
+    def b64encode(data) -> bytes:
+        return binascii.b2a_base64(data, newline=False)
+
+# Fast JSON encoder for the progress stream; fall back to the stdlib
+try:
+    import orjson
+
+    def json_line(obj: Dict[str, Any]) -> bytes:
+        return orjson.dumps(obj) + b'\n'
+except ImportError:
+    def json_line(obj: Dict[str, Any]) -> bytes:
+        return json.dumps(obj).encode() + b'\n'
+
 # Initialize Flask app
 app = Flask(__name__)
 
@@ -38,8 +64,12 @@ class Config:
     MAX_RECIPIENTS = 100
     MAX_EMAIL_BODY_LENGTH = 5000
     MAX_SUBJECT_LENGTH = 200
-    EMAIL_DELAY = 1  # seconds between emails to avoid rate limiting
+    EMAIL_DELAY = 1  # seconds between emails on each connection to avoid rate limiting
+    SMTP_CONNECTIONS = 4  # concurrent SMTP sessions per campaign
+    RECIPIENTS_PER_MESSAGE = 1  # >1 shares one SMTP transaction with an undisclosed To
     SMTP_TIMEOUT = 30
+    ENCODE_CHUNK_SIZE = 57 * 1024  # a multiple of 57 bytes encodes to whole 76-char lines
+    SMTP_CACHE_TTL = 60  # seconds an authenticated /test-email session is reused
 
 
 app.config['MAX_CONTENT_LENGTH'] = Config.MAX_FILE_SIZE
@@ -48,19 +78,48 @@ app.config['MAX_CONTENT_LENGTH'] = Config.MAX_FILE_SIZE
 logging.basicConfig(level=logging.INFO)
 logger = app.logger
 
-# Email validation regex
-EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+# Email validation regex (strict mode), on the linear-time RE2 engine if installed
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+try:
+    import re2
+    EMAIL_REGEX = re2.compile(EMAIL_PATTERN)
+except ImportError:
+    EMAIL_REGEX = re.compile(EMAIL_PATTERN)
+
+# Line breaks as the email generator splits them
+NEWLINE_REGEX = re.compile(r'\r\n|\r|\n')
+
+# Characters rejected by the fast email check
+EMAIL_FORBIDDEN_CHARS = frozenset(' \t\r\n"<>()[]\\,;:')
 
 
 class EmailValidator:
     """Handles email validation"""
 
     @staticmethod
-    def validate_email(email: str) -> bool:
-        """Validate email format"""
+    def validate_email(email: str, strict: bool = False) -> bool:
+        """Validate email format with a single-pass scan, or the regex if strict"""
         if not email or len(email) > 254:
             return False
-        return EMAIL_REGEX.match(email.strip()) is not None
+        email = email.strip()
+        if strict:
+            return EMAIL_REGEX.match(email) is not None
+        at = email.find('@')
+        dot = email.rfind('.')
+        return (0 < at < dot - 1 < len(email) - 3
+                and email.count('@') == 1
+                and email.isascii()
+                and email.isprintable()
+                and EMAIL_FORBIDDEN_CHARS.isdisjoint(email))
+
+    @staticmethod
+    def filter_emails(emails: List[Any]) -> List[str]:
+        """Return the stripped, valid addresses from a list in one pass"""
+        return [
+            email for email in
+            (e.strip() for e in emails if isinstance(e, str))
+            if EmailValidator.validate_email(email)
+        ]
 
     @staticmethod
     def validate_file(filename: str) -> bool:
@@ -81,14 +140,52 @@ class EmailValidator:
 class EmailSender:
     """Handles email sending operations"""
 
+    # Stand-ins swapped out of the serialized template: the To address is
+    # spliced per recipient, the payload replaced by its pre-encoded data
+    TO_PLACEHOLDER = 'recipient@placeholder.invalid'
+    PAYLOAD_PLACEHOLDER = 'attachment-payload-placeholder'
+    MAX_LINE_OCTETS = 998  # RFC 5321/5322 line limit, excluding CRLF
+    UNDISCLOSED_RECIPIENTS = 'undisclosed-recipients:;'
+
     def __init__(self, smtp_server: str = "smtp.gmail.com", smtp_port: int = 587):
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
 
-    def create_message(self, sender_email: str, sender_name: str,
-                       recipient_email: str, subject: str, body: str,
-                       cv_data: bytes, cv_filename: str) -> MIMEMultipart:
-        """Create email message with attachment"""
+    def create_attachment(self, cv_stream: IO[bytes],
+                          cv_filename: str) -> MIMEBase:
+        """Create the base64-encoded PDF part shared by every message.
+
+        The file is encoded straight from cv_stream in chunks, without
+        reading it whole. cv_filename must already have been passed
+        through secure_filename.
+        """
+        try:
+            chunks = []
+            while chunk := cv_stream.read(Config.ENCODE_CHUNK_SIZE):
+                chunks.append(self._encode_base64(chunk))
+
+            part = MIMEBase('application', 'pdf')
+            part.set_payload('\r\n'.join(chunks))
+            part['Content-Transfer-Encoding'] = 'base64'
+            part.add_header(
+                'Content-Disposition',
+                f'attachment; filename="{cv_filename}"'
+            )
+            return part
+        except Exception as e:
+            logger.error(f"Error attaching file: {e}")
+            raise
+
+    def build_template(self, sender_email: str, sender_name: str,
+                       subject: str, body: str,
+                       attachment: Optional[MIMEBase],
+                       eight_bit: bool = False) -> MIMEMultipart:
+        """Build the per-campaign message once; only the To header varies.
+
+        With eight_bit the body is sent as raw UTF-8 (7bit if pure ASCII)
+        instead of base64, for servers that advertise 8BITMIME, provided no
+        line exceeds the 998-octet SMTP limit.
+        """
         msg = MIMEMultipart()
 
         # Set headers
@@ -97,137 +194,392 @@ class EmailSender:
         else:
             msg['From'] = sender_email
 
-        msg['To'] = recipient_email
+        msg['To'] = self.TO_PLACEHOLDER
         msg['Subject'] = subject[:Config.MAX_SUBJECT_LENGTH]
 
         # Attach body
-        msg.attach(
-            MIMEText(body[:Config.MAX_EMAIL_BODY_LENGTH], 'plain', 'utf-8'))
+        text = body[:Config.MAX_EMAIL_BODY_LENGTH]
+        charset = Charset('utf-8')
+        if eight_bit and all(len(line.encode()) <= self.MAX_LINE_OCTETS
+                             for line in NEWLINE_REGEX.split(text)):
+            charset.body_encoding = None
+        msg.attach(MIMEText(text, 'plain', charset))
 
         # Attach PDF
-        if cv_data and cv_filename:
-            try:
-                part = MIMEBase('application', 'pdf')
-                part.set_payload(cv_data)
-                encoders.encode_base64(part)
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename="{secure_filename(cv_filename)}"'
-                )
-                msg.attach(part)
-            except Exception as e:
-                logger.error(f"Error attaching file: {e}")
-                raise
+        if attachment is not None:
+            msg.attach(attachment)
 
         return msg
 
+    def serialize_template(self, template: MIMEMultipart,
+                           attachment: Optional[MIMEBase] = None) -> Tuple[memoryview, memoryview]:
+        """Serialize the template once, split around the To placeholder.
+
+        The attachment is serialized with a stand-in payload and its
+        pre-wrapped base64 spliced in afterwards, so the generator does not
+        walk the encoded file line by line.
+        """
+        payload = None
+        if attachment is not None:
+            payload = attachment.get_payload()
+            attachment.set_payload(self.PAYLOAD_PLACEHOLDER)
+        try:
+            data = template.as_bytes(policy=template.policy.clone(linesep='\r\n'))
+        finally:
+            if attachment is not None:
+                attachment.set_payload(payload)
+
+        # The attachment is the last part, so its stand-in is the last match
+        if payload is not None:
+            placeholder = self.PAYLOAD_PLACEHOLDER.encode('ascii')
+            start = data.rindex(placeholder)
+            data = b''.join((data[:start], payload.encode('ascii'),
+                             data[start + len(placeholder):]))
+
+        # Split without copying; both halves are views of the same buffer
+        marker = b'\r\nTo: '
+        offset = data.index(marker + self.TO_PLACEHOLDER.encode('ascii')) + len(marker)
+        view = memoryview(data)
+        return view[:offset], view[offset + len(self.TO_PLACEHOLDER):]
+
     def send_emails_batch(self, sender_email: str, sender_name: str,
                           password: str, subject: str, body: str,
-                          recipients: List[str], cv_data: bytes,
-                          cv_filename: str) -> Generator[str, None, None]:
-        """Generator for sending emails with real-time updates"""
+                          recipients: List[str],
+                          attachment: Optional[MIMEBase]) -> Generator[bytes, None, None]:
+        """Generator for sending emails with real-time updates.
+
+        The campaign runs on an asyncio event loop in a background thread;
+        its events are handed back through a thread-safe queue. Recipients
+        are expected to have been validated by the caller.
+        """
+        events: queue.Queue = queue.Queue()
+        loop = asyncio.new_event_loop()
+        campaign = loop.create_task(self._run_campaign(
+            sender_email, sender_name, password, subject, body,
+            recipients, attachment, events.put_nowait
+        ))
+        # Let the campaign free the MIME tree once it has been serialized
+        del attachment
+
+        def run() -> None:
+            try:
+                loop.run_until_complete(campaign)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+                events.put(None)
+
+        threading.Thread(target=run, daemon=True).start()
+
+        try:
+            while (event := events.get()) is not None:
+                yield event
+        finally:
+            # Stop sending if the client went away mid-campaign
+            if not campaign.done():
+                try:
+                    loop.call_soon_threadsafe(campaign.cancel)
+                except RuntimeError:
+                    pass
+
+    async def _run_campaign(self, sender_email: str, sender_name: str,
+                            password: str, subject: str, body: str,
+                            recipients: List[str], attachment: Optional[MIMEBase],
+                            emit: Callable[[bytes], None]) -> None:
+        """Send a campaign over a pool of SMTP connections, emitting events"""
 
         total = len(recipients)
         sent = 0
         failed = 0
         server = None
+        tasks: List[asyncio.Task] = []
 
         # Initial status
-        yield self._create_response('log', 'Starting email campaign...', 'info')
+        emit(self._create_response('log', 'Starting email campaign...', 'info'))
 
         try:
             # Connect to SMTP server
-            yield self._create_response('log', f'Connecting to {self.smtp_server}...', 'info')
+            emit(self._create_response('log', f'Connecting to {self.smtp_server}...', 'info'))
 
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port,
-                                  timeout=Config.SMTP_TIMEOUT)
-            server.starttls()
+            server = aiosmtplib.SMTP(hostname=self.smtp_server, port=self.smtp_port,
+                                     timeout=Config.SMTP_TIMEOUT, start_tls=True)
+            await server.connect()
 
-            # Authenticate
-            yield self._create_response('log', 'Authenticating...', 'info')
+            # Authenticate, encoding the credentials once for every connection
+            emit(self._create_response('log', 'Authenticating...', 'info'))
+            auth_blob = self.auth_plain_blob(sender_email, password)
 
             try:
-                server.login(sender_email, password)
-                yield self._create_response('log', 'Authentication successful', 'success')
-            except smtplib.SMTPAuthenticationError as e:
+                await self._login(server, sender_email, password, auth_blob)
+                emit(self._create_response('log', 'Authentication successful', 'success'))
+            except aiosmtplib.SMTPAuthenticationError as e:
                 error_msg = str(e)
                 if 'Username and Password not accepted' in error_msg:
-                    yield self._create_response('log',
-                                                'Authentication failed! For Gmail, use an App Password, not your regular password. ' +
-                                                'Generate one at: https://myaccount.google.com/apppasswords',
-                                                'error')
+                    emit(self._create_response('log',
+                                               'Authentication failed! For Gmail, use an App Password, not your regular password. ' +
+                                               'Generate one at: https://myaccount.google.com/apppasswords',
+                                               'error'))
                 else:
-                    yield self._create_response('log', f'Authentication failed: {error_msg}', 'error')
+                    emit(self._create_response('log', f'Authentication failed: {error_msg}', 'error'))
                 return
 
-            # Send emails
-            yield self._create_response('log', f'Sending to {total} recipients...', 'info')
-
-            for i, recipient in enumerate(recipients, 1):
-                try:
-                    # Validate recipient
-                    if not EmailValidator.validate_email(recipient):
+            # Build and serialize the message once around the pre-encoded attachment
+            template = self.build_template(
+                sender_email, sender_name, subject, body, attachment,
+                server.supports_extension('8bitmime')
+            )
+            head, tail = self.serialize_template(template, attachment)
+
+            # Declare 8BITMIME only if the body part actually went out as 8bit
+            body_cte = template.get_payload(0)['Content-Transfer-Encoding']
+            mail_options = ['BODY=8BITMIME'] if body_cte == '8bit' else []
+
+            # Only the serialized bytes are needed from here on
+            del template, attachment
+
+            # Send emails, spreading recipients over a pool of connections
+            emit(self._create_response('log', f'Sending to {total} recipients...', 'info'))
+
+            processed = 0
+
+            if recipients:
+                workers = min(Config.SMTP_CONNECTIONS, total)
+                results: asyncio.Queue = asyncio.Queue()
+
+                # The first worker reuses the session authenticated above
+                tasks = [
+                    asyncio.create_task(self._send_worker(
+                        server if k == 0 else None, head, tail, mail_options,
+                        sender_email, password, auth_blob, recipients[k::workers], results
+                    ))
+                    for k in range(workers)
+                ]
+                server = None
+
+                for _ in recipients:
+                    recipient, error = await results.get()
+                    processed += 1
+
+                    if error is None:
+                        sent += 1
+                        log = self._create_response('log', f'✓ Sent to: {recipient}', 'success')
+                    else:
                         failed += 1
-                        yield self._create_response('log', f'Invalid email: {recipient}', 'error')
-                        continue
-
-                    # Create and send message
-                    msg = self.create_message(
-                        sender_email, sender_name, recipient,
-                        subject, body, cv_data, cv_filename
-                    )
-
-                    server.sendmail(sender_email, recipient, msg.as_string())
-                    sent += 1
+                        log = self._create_response('log',
+                                                    f'✗ Failed to send to {recipient}: {error}', 'error')
 
-                    yield self._create_response('log', f'✓ Sent to: {recipient}', 'success')
+                    # One write per recipient for the log line and progress
+                    emit(log + self._create_progress(processed, total, sent, failed))
 
-                except Exception as e:
-                    failed += 1
-                    logger.error(f"Failed to send to {recipient}: {e}")
-                    yield self._create_response('log',
-                                                f'✗ Failed to send to {recipient}: {str(e)}', 'error')
-
-                # Progress update
-                progress = int((i / total) * 100)
-                pending = total - sent - failed
-
-                yield json.dumps({
-                    'type': 'progress',
-                    'progress': progress,
-                    'total': total,
-                    'sent': sent,
-                    'failed': failed,
-                    'pending': pending
-                }) + '\n'
-
-                # Rate limiting
-                if i < total:  # Don't delay after last email
-                    time.sleep(Config.EMAIL_DELAY)
+                await asyncio.gather(*tasks)
 
             # Completion
-            yield self._create_response('log',
-                                        f'Campaign completed! Sent: {sent}, Failed: {failed}', 'success')
-            yield json.dumps({'type': 'complete', 'sent': sent, 'failed': failed}) + '\n'
+            emit(self._create_response('log',
+                                       f'Campaign completed! Sent: {sent}, Failed: {failed}', 'success'))
+            emit(json_line({'type': 'complete', 'sent': sent, 'failed': failed}))
 
         except Exception as e:
-            logger.error(f"Unexpected error in send_emails_batch: {e}")
-            yield self._create_response('log', f'Error: {str(e)}', 'error')
+            logger.error(f"Unexpected error in _run_campaign: {e}")
+            emit(self._create_response('log', f'Error: {str(e)}', 'error'))
         finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             if server:
+                await self._disconnect(server)
+
+    @staticmethod
+    def auth_plain_blob(sender_email: str, password: str) -> bytes:
+        """Encode AUTH PLAIN credentials once for reuse across sessions"""
+        return b64encode(f'\0{sender_email}\0{password}'.encode())
+
+    @staticmethod
+    async def _login(server: aiosmtplib.SMTP, sender_email: str, password: str,
+                     auth_blob: bytes) -> None:
+        """Authenticate with the precomputed AUTH PLAIN blob when offered"""
+        await server.ehlo()
+        if 'plain' not in server.server_auth_methods:
+            await server.login(sender_email, password)
+            return
+        response = await server.execute_command(b'AUTH', b'PLAIN', auth_blob)
+        if response.code != 235:
+            raise aiosmtplib.SMTPAuthenticationError(response.code, response.message)
+
+    @staticmethod
+    def login_smtp(server: smtplib.SMTP, sender_email: str, password: str,
+                   auth_blob: bytes) -> None:
+        """Blocking counterpart of _login for smtplib sessions"""
+        server.ehlo()
+        if 'PLAIN' not in server.esmtp_features.get('auth', '').upper().split():
+            server.login(sender_email, password)
+            return
+        code, response = server.docmd('AUTH', 'PLAIN ' + auth_blob.decode('ascii'))
+        if code != 235:
+            raise smtplib.SMTPAuthenticationError(code, response)
+
+    async def _connect(self, sender_email: str, password: str,
+                       auth_blob: bytes) -> aiosmtplib.SMTP:
+        """Open an authenticated SMTP session"""
+        server = aiosmtplib.SMTP(hostname=self.smtp_server, port=self.smtp_port,
+                                 timeout=Config.SMTP_TIMEOUT, start_tls=True)
+        await server.connect()
+        try:
+            await self._login(server, sender_email, password, auth_blob)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    async def _disconnect(server: aiosmtplib.SMTP) -> None:
+        """Close an SMTP session, ignoring errors"""
+        try:
+            await server.quit()
+        except Exception:
+            server.close()
+
+    async def _send_worker(self, server: Optional[aiosmtplib.SMTP], head: memoryview, tail: memoryview,
+                           mail_options: List[str], sender_email: str, password: str,
+                           auth_blob: bytes, recipients: List[str],
+                           results: asyncio.Queue) -> None:
+        """Send to a share of the recipients over a single SMTP connection"""
+        try:
+            if server is None:
+                server = await self._connect(sender_email, password, auth_blob)
+        except Exception as e:
+            logger.error(f"Worker failed to connect: {e}")
+            for recipient in recipients:
+                results.put_nowait((recipient, f'Connection failed: {e}'))
+            return
+
+        per_message = max(1, Config.RECIPIENTS_PER_MESSAGE)
+        next_allowed = time.monotonic()
+        try:
+            for start in range(0, len(recipients), per_message):
+                # Rate limiting, per connection: a one-token bucket refilled
+                # every EMAIL_DELAY, so time spent sending counts toward it
+                delay = next_allowed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_allowed = max(next_allowed, time.monotonic()) + Config.EMAIL_DELAY
+
+                # One MAIL FROM / RCPT TO... / DATA transaction per chunk
+                chunk = recipients[start:start + per_message]
+                to = chunk[0] if len(chunk) == 1 else self.UNDISCLOSED_RECIPIENTS
                 try:
-                    server.quit()
-                except:
-                    pass
+                    message = b''.join((head, to.encode('ascii'), tail))
+                    refused, _ = await server.sendmail(sender_email, chunk, message,
+                                                       mail_options=mail_options)
+                    del message
+                except aiosmtplib.SMTPRecipientsRefused as e:
+                    refused = {r.recipient: r for r in e.recipients}
+                except Exception as e:
+                    logger.error(f"Failed to send to {', '.join(chunk)}: {e}")
+                    for recipient in chunk:
+                        results.put_nowait((recipient, str(e)))
+                    continue
+
+                for recipient in chunk:
+                    if recipient in refused:
+                        error = f'{refused[recipient].code} {refused[recipient].message}'
+                        logger.error(f"Failed to send to {recipient}: {error}")
+                        results.put_nowait((recipient, error))
+                    else:
+                        results.put_nowait((recipient, None))
+        finally:
+            await self._disconnect(server)
+
+    @staticmethod
+    def _encode_base64(data: bytes) -> str:
+        """Base64-encode data in one C call, wrapped at 76 chars per CRLF line"""
+        encoded = b64encode(data).decode('ascii')
+        return '\r\n'.join([encoded[i:i + 76] for i in range(0, len(encoded), 76)])
 
     @staticmethod
-    def _create_response(msg_type: str, message: str, level: str = 'info') -> str:
-        """Create JSON response string"""
-        return json.dumps({
+    def _create_progress(processed: int, total: int, sent: int, failed: int) -> bytes:
+        """Create JSON progress update line"""
+        return json_line({
+            'type': 'progress',
+            'progress': int((processed / total) * 100),
+            'total': total,
+            'sent': sent,
+            'failed': failed,
+            'pending': total - sent - failed
+        })
+
+    @staticmethod
+    def _create_response(msg_type: str, message: str, level: str = 'info') -> bytes:
+        """Create JSON response line"""
+        return json_line({
             'type': msg_type,
             'message': message,
             'level': level
-        }) + '\n'
+        })
+
+
+# Authenticated /test-email sessions by (email, password digest)
+_smtp_cache: Dict[Tuple[str, bytes], Tuple[smtplib.SMTP, float]] = {}
+_smtp_cache_lock = threading.Lock()
+
+
+def close_smtp(server: smtplib.SMTP) -> None:
+    """Close an SMTP session, ignoring errors"""
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def expire_smtp(key: Tuple[str, bytes], server: smtplib.SMTP) -> None:
+    """Drop and close a cached session once its TTL has run out"""
+    with _smtp_cache_lock:
+        entry = _smtp_cache.get(key)
+        if entry is None or entry[0] is not server:
+            # Checked out (closed on check-in) or already replaced
+            return
+        del _smtp_cache[key]
+    close_smtp(server)
+
+
+def checkout_smtp(key: Tuple[str, bytes]) -> Optional[Tuple[smtplib.SMTP, float]]:
+    """Take a live, unexpired cached session for key"""
+    with _smtp_cache_lock:
+        entry = _smtp_cache.pop(key, None)
+
+    if entry is None:
+        return None
+
+    server, created = entry
+    try:
+        if (time.monotonic() - created < Config.SMTP_CACHE_TTL
+                and server.noop()[0] == 250):
+            return entry
+    except Exception:
+        pass
+
+    close_smtp(server)
+    return None
+
+
+def checkin_smtp(key: Tuple[str, bytes], server: smtplib.SMTP,
+                 created: Optional[float] = None) -> None:
+    """Return a session to the cache; a new one is closed when its TTL runs out"""
+    if created is None:
+        created = time.monotonic()
+        timer = threading.Timer(Config.SMTP_CACHE_TTL, expire_smtp, (key, server))
+        timer.daemon = True
+        timer.start()
+    elif time.monotonic() - created >= Config.SMTP_CACHE_TTL:
+        close_smtp(server)
+        return
+
+    with _smtp_cache_lock:
+        previous = _smtp_cache.pop(key, None)
+        _smtp_cache[key] = (server, created)
+
+    if previous is not None and previous[0] is not server:
+        close_smtp(previous[0])
 
 
 # Initialize email sender
@@ -277,11 +629,23 @@ def test_email():
         if not EmailValidator.validate_email(sender_email):
             return jsonify({'status': 'error', 'message': 'Invalid email format'}), 400
 
+        # Reuse a recently authenticated session if it is still alive
+        key = (sender_email, hashlib.sha256(password.encode()).digest())
+        cached = checkout_smtp(key)
+        if cached is not None:
+            checkin_smtp(key, *cached)
+            return jsonify({'status': 'success', 'message': 'Authentication successful'}), 200
+
         # Test connection
         server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
-        server.starttls()
-        server.login(sender_email, password)
-        server.quit()
+        try:
+            server.starttls()
+            EmailSender.login_smtp(server, sender_email, password,
+                                   EmailSender.auth_plain_blob(sender_email, password))
+        except Exception:
+            server.close()
+            raise
+        checkin_smtp(key, server)
 
         return jsonify({'status': 'success', 'message': 'Authentication successful'}), 200
 
@@ -327,11 +691,8 @@ def send_emails():
             if not isinstance(recipients, list):
                 return jsonify({'error': 'Recipients must be a list'}), 400
 
-            # Filter and validate recipients
-            valid_recipients = []
-            for r in recipients:
-                if isinstance(r, str) and EmailValidator.validate_email(r):
-                    valid_recipients.append(r.strip())
+            # Filter and validate recipients in a single pass
+            valid_recipients = EmailValidator.filter_emails(recipients)
 
             if not valid_recipients:
                 return jsonify({'error': 'No valid recipients found'}), 400
@@ -354,21 +715,27 @@ def send_emails():
         if not EmailValidator.validate_file(cv_file.filename):
             return jsonify({'error': 'Invalid file type. Only PDF files are allowed'}), 400
 
-        # Read and validate file content
-        cv_file.seek(0)
-        cv_data = cv_file.read()
+        # Check the magic bytes before encoding the rest of the file
+        cv_file.stream.seek(0)
+        header = cv_file.stream.read(4)
 
-        if not cv_data:
+        if not header:
             return jsonify({'error': 'Empty file uploaded'}), 400
 
-        if len(cv_data) > Config.MAX_FILE_SIZE:
-            return jsonify({'error': f'File too large. Maximum size: {Config.MAX_FILE_SIZE/1024/1024}MB'}), 400
-
-        if not EmailValidator.validate_pdf_content(cv_data):
+        if not EmailValidator.validate_pdf_content(header):
             return jsonify({'error': 'Invalid PDF file content'}), 400
 
+        # Size the upload in place; Werkzeug has already spooled it
+        cv_file.stream.seek(0, os.SEEK_END)
+        if cv_file.stream.tell() > Config.MAX_FILE_SIZE:
+            return jsonify({'error': f'File too large. Maximum size: {Config.MAX_FILE_SIZE/1024/1024}MB'}), 400
+
         cv_filename = secure_filename(cv_file.filename)
 
+        # Encode the attachment once for the whole campaign
+        cv_file.stream.seek(0)
+        attachment = email_sender.create_attachment(cv_file.stream, cv_filename)
+
         # Log the request
         logger.info(
             f"Starting email campaign: {len(valid_recipients)} recipients, from: {sender_email}")
@@ -378,7 +745,7 @@ def send_emails():
             stream_with_context(
                 email_sender.send_emails_batch(
                     sender_email, sender_name, password, subject, body,
-                    valid_recipients, cv_data, cv_filename
+                    valid_recipients, attachment
                 )
             ),
             mimetype='application/x-ndjson',